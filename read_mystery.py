@@ -5,10 +5,238 @@ Weather Data Analysis and Visualization
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime, timedelta
 import os
+import warnings
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Elements per work chunk for the streaming kernels
+STATS_CHUNK = 1 << 20
+
+# Let LLVM reorder and vectorize the reductions; 'nnan'/'ninf' are left out
+# because the kernels have to see NaN and inf values to count or skip them
+FASTMATH_FLAGS = {'reassoc', 'contract', 'arcp', 'nsz'}
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=FASTMATH_FLAGS, cache=True)
+    def _fused_stats_kernel(flat):
+        """Per-chunk min/max (with argmax), shifted float64 moments and special-value counts"""
+        n = flat.size
+        nchunks = max(1, (n + STATS_CHUNK - 1) // STATS_CHUNK)
+        mins = np.full(nchunks, np.inf)
+        maxs = np.full(nchunks, -np.inf)
+        valid = np.zeros(nchunks)
+        shifts = np.zeros(nchunks)
+        sums = np.zeros(nchunks)
+        sumsqs = np.zeros(nchunks)
+        counts = np.zeros((nchunks, 4), dtype=np.int64)
+        # Flat index of each chunk's first maximum and first NaN (-1 if none)
+        indices = np.full((nchunks, 2), -1, dtype=np.int64)
+        for c in prange(nchunks):
+            start = c * STATS_CHUNK
+            stop = min(start + STATS_CHUNK, n)
+            mn = np.inf
+            mx = -np.inf
+            mx_idx = start
+            first_nan = -1
+            # Accumulate around the chunk's first value so the sum of squares
+            # does not cancel; a NaN/inf start makes the result NaN/inf anyway
+            shift = np.float64(flat[start])
+            if not np.isfinite(shift):
+                shift = 0.0
+            acc = 0.0
+            accsq = 0.0
+            nan_cnt = 0
+            inf_cnt = 0
+            zero_cnt = 0
+            neg_cnt = 0
+            for i in range(start, stop):
+                v = np.float64(flat[i])
+                if np.isnan(v):
+                    if nan_cnt == 0:
+                        first_nan = i
+                    nan_cnt += 1
+                    continue
+                if np.isinf(v):
+                    inf_cnt += 1
+                if v < mn:
+                    mn = v
+                if v > mx:
+                    mx = v
+                    mx_idx = i
+                if v == 0:
+                    zero_cnt += 1
+                elif v < 0:
+                    neg_cnt += 1
+                d = v - shift
+                acc += d
+                accsq += d * d
+            mins[c] = mn
+            maxs[c] = mx
+            valid[c] = stop - start - nan_cnt
+            shifts[c] = shift
+            sums[c] = acc
+            sumsqs[c] = accsq
+            counts[c, 0] = nan_cnt
+            counts[c, 1] = inf_cnt
+            counts[c, 2] = zero_cnt
+            counts[c, 3] = neg_cnt
+            indices[c, 0] = mx_idx
+            indices[c, 1] = first_nan
+        return mins, maxs, valid, shifts, sums, sumsqs, counts, indices
+
+def _chunked_stats(flat):
+    """NumPy version of _fused_stats_kernel: every pass runs on a cache-sized chunk"""
+    nchunks = max(1, (flat.size + STATS_CHUNK - 1) // STATS_CHUNK)
+    mins = np.full(nchunks, np.inf)
+    maxs = np.full(nchunks, -np.inf)
+    valid = np.zeros(nchunks)
+    shifts = np.zeros(nchunks)
+    sums = np.zeros(nchunks)
+    sumsqs = np.zeros(nchunks)
+    counts = np.zeros((nchunks, 4), dtype=np.int64)
+    indices = np.full((nchunks, 2), -1, dtype=np.int64)
+    for c in range(nchunks):
+        start = c * STATS_CHUNK
+        chunk = flat[start:start + STATS_CHUNK]
+        nan_mask = np.isnan(chunk)
+        nan_cnt = np.count_nonzero(nan_mask)
+        values = (chunk[~nan_mask] if nan_cnt else chunk).astype(np.float64)
+        if nan_cnt:
+            # The argmax is only reported when there are no NaNs
+            indices[c, 1] = start + np.argmax(nan_mask)
+        elif values.size:
+            indices[c, 0] = start + np.argmax(values)
+        if values.size:
+            mins[c] = values.min()
+            maxs[c] = values.max()
+        valid[c] = values.size
+        if values.size and np.isfinite(values[0]):
+            shifts[c] = values[0]
+        shifted = values - shifts[c]
+        sums[c] = shifted.sum()
+        sumsqs[c] = np.dot(shifted, shifted)
+        counts[c] = (nan_cnt, np.count_nonzero(np.isinf(chunk)),
+                     np.count_nonzero(chunk == 0), np.count_nonzero(chunk < 0))
+    return mins, maxs, valid, shifts, sums, sumsqs, counts, indices
+
+def fused_stats(data):
+    """Min, max, flat argmax, mean, std and NaN/inf/zero/negative counts in one sweep"""
+    flat = np.asarray(data).reshape(-1)
+    if HAS_NUMBA:
+        mins, maxs, valid, shifts, sums, sumsqs, counts, indices = _fused_stats_kernel(flat)
+    else:
+        mins, maxs, valid, shifts, sums, sumsqs, counts, indices = _chunked_stats(flat)
+    
+    nan_count, inf_count, zero_count, negative_count = counts.sum(axis=0)
+    if nan_count > 0:
+        # Match np.min/np.max/np.mean/np.std, which propagate NaN, and
+        # np.argmax, which returns the first NaN
+        first_nans = indices[:, 1]
+        return (np.nan, np.nan, first_nans[first_nans >= 0].min(), np.nan, np.nan,
+                nan_count, inf_count, zero_count, negative_count)
+    
+    # First occurrence of the maximum: earliest chunk holding it, then its own argmax
+    max_index = indices[np.argmax(maxs), 0]
+    
+    # Each chunk's moments are taken around its own shift, so its M2 does not
+    # cancel; the chunks are then merged with Chan et al.'s parallel update
+    n = valid.sum()
+    chunk_means = shifts + sums / valid
+    chunk_m2 = sumsqs - sums * sums / valid
+    mean = np.sum(valid * chunk_means) / n
+    m2 = np.sum(chunk_m2) + np.sum(valid * (chunk_means - mean) ** 2)
+    std = np.sqrt(max(m2 / n, 0.0))
+    return (mins.min(), maxs.max(), max_index, mean, std,
+            nan_count, inf_count, zero_count, negative_count)
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=FASTMATH_FLAGS, cache=True)
+    def _tiled_mean_std_kernel(data_tm, hb, wb, skip_nans):
+        """Welford mean/std over time, one cache-sized (lat, lon) tile per task"""
+        nt, nh, nw = data_tm.shape
+        mean = np.empty((nh, nw))
+        std = np.empty((nh, nw))
+        tiles_w = (nw + wb - 1) // wb
+        ntiles = ((nh + hb - 1) // hb) * tiles_w
+        for tile in prange(ntiles):
+            h0 = (tile // tiles_w) * hb
+            w0 = (tile % tiles_w) * wb
+            h1 = min(h0 + hb, nh)
+            w1 = min(w0 + wb, nw)
+            count = np.zeros((h1 - h0, w1 - w0))
+            mu = np.zeros((h1 - h0, w1 - w0))
+            m2 = np.zeros((h1 - h0, w1 - w0))
+            for t in range(nt):
+                for h in range(h0, h1):
+                    for w in range(w0, w1):
+                        v = np.float64(data_tm[t, h, w])
+                        if skip_nans and np.isnan(v):
+                            continue
+                        i = h - h0
+                        j = w - w0
+                        count[i, j] += 1
+                        delta = v - mu[i, j]
+                        mu[i, j] += delta / count[i, j]
+                        m2[i, j] += delta * (v - mu[i, j])
+            for i in range(h1 - h0):
+                for j in range(w1 - w0):
+                    if count[i, j] == 0:
+                        mean[h0 + i, w0 + j] = np.nan
+                        std[h0 + i, w0 + j] = np.nan
+                    else:
+                        mean[h0 + i, w0 + j] = mu[i, j]
+                        std[h0 + i, w0 + j] = np.sqrt(m2[i, j] / count[i, j])
+        return mean, std
+
+def tiled_nanmean_std_over_t(data_tm, hb=64, wb=256, skip_nans=True):
+    """Mean and std over time of a time-major cube, as 2D maps
+
+    skip_nans=False drops the per-sample NaN check when the cube has none.
+    """
+    if HAS_NUMBA:
+        return _tiled_mean_std_kernel(np.asarray(data_tm), hb, wb, skip_nans)
+    
+    # Fallback without Numba: separate NumPy reductions
+    if skip_nans:
+        return np.nanmean(data_tm, axis=0), np.nanstd(data_tm, axis=0)
+    return np.mean(data_tm, axis=0), np.std(data_tm, axis=0)
+
+def block_reduce(a, by=4, bx=4, func=np.nanmean):
+    """Downsample a 2D map by reducing by x bx blocks with func (ragged edges are dropped)"""
+    h = a.shape[0] // by * by
+    w = a.shape[1] // bx * bx
+    with warnings.catch_warnings():
+        # All-NaN blocks stay NaN; don't warn about them
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return func(a[:h, :w].reshape(h // by, by, w // bx, bx), axis=(1, 3))
+
+def imshow_downsampled(a, by=4, bx=4, **kwargs):
+    """imshow a block-averaged map, keeping the axes in original grid indices
+
+    The colour limits come from the full-resolution map (unless vmin/vmax are
+    given), so averaging does not shrink the colour scale.
+    """
+    import matplotlib.pyplot as plt
+    
+    kwargs.setdefault('vmin', np.nanmin(a))
+    kwargs.setdefault('vmax', np.nanmax(a))
+    small = block_reduce(a, by, bx)
+    extent = (-0.5, small.shape[1] * bx - 0.5, small.shape[0] * by - 0.5, -0.5)
+    return plt.imshow(small, extent=extent, rasterized=True, **kwargs)
+
+def save_figure(path):
+    """Save the current figure with the shared PNG output settings"""
+    import matplotlib.pyplot as plt
+    
+    # tight_layout() has already been applied, so skip the extra
+    # bbox_inches='tight' layout pass; 150 dpi is ample for on-screen PNGs
+    with plt.rc_context({'agg.path.chunksize': 10000}):
+        plt.savefig(path, dpi=150)
 
 def basic_analysis(data):
     """Basic statistical analysis of the data"""
@@ -22,24 +250,26 @@ def basic_analysis(data):
     print(f"Total elements: {data.size}")
     print(f"Memory usage: {data.nbytes / (1024*1024):.2f} MB")
     
+    # Single streaming sweep for everything except the median
+    (min_value, max_value, max_index, mean, std,
+     nan_count, inf_count, zero_count, negative_count) = fused_stats(data)
+    
     print(f"\nStatistical Information:")
-    print(f"Min value: {np.min(data):.2f}")
-    print(f"Max value: {np.max(data):.2f}")
-    print(f"Mean: {np.mean(data):.2f}")
-    print(f"Std deviation: {np.std(data):.2f}")
+    print(f"Min value: {min_value:.2f}")
+    print(f"Max value: {max_value:.2f}")
+    print(f"Mean: {mean:.2f}")
+    print(f"Std deviation: {std:.2f}")
     print(f"Median: {np.median(data):.2f}")
     
-    # Check for special values
-    nan_count = np.isnan(data).sum()
-    inf_count = np.isinf(data).sum()
-    zero_count = (data == 0).sum()
-    negative_count = (data < 0).sum()
-    
     print(f"\nData Quality:")
     print(f"NaN values: {nan_count}")
     print(f"Infinite values: {inf_count}")
     print(f"Zero values: {zero_count}")
     print(f"Negative values: {negative_count}")
+    
+    # Position of the global maximum, as (lat, lon, time) indices
+    max_location = np.unravel_index(max_index, data.shape)
+    return nan_count > 0, max_location
 
 def analyze_dimensions(data):
     """Analyze what each dimension might represent"""
@@ -74,18 +304,24 @@ def analyze_dimensions(data):
     elif depth < 50:
         print("  - Could be atmospheric levels or short time series")
 
-def temporal_analysis(data):
-    """Analyze temporal patterns"""
+def temporal_analysis(data_tm, has_nans=True):
+    """Analyze temporal patterns (data_tm is time-major: time, lat, lon)"""
     print("\n" + "=" * 60)
     print("TEMPORAL PATTERN ANALYSIS")
     print("=" * 60)
     
     # Calculate global means for each time step
-    global_means = np.nanmean(data, axis=(0, 1))
+    # The NaN-aware mean copies the cube to mask NaNs; skip it when there are none
+    mean_fn = np.nanmean if has_nans else np.mean
+    global_means = mean_fn(data_tm, axis=(1, 2))
+    
+    # Extreme time steps, reused by the plotting code
+    min_idx = np.argmin(global_means)
+    max_idx = np.argmax(global_means)
     
     print(f"Time series statistics:")
-    print(f"Min global mean: {np.min(global_means):.2f}")
-    print(f"Max global mean: {np.max(global_means):.2f}")
+    print(f"Min global mean: {global_means[min_idx]:.2f}")
+    print(f"Max global mean: {global_means[max_idx]:.2f}")
     print(f"Mean of means: {np.mean(global_means):.2f}")
     print(f"Std of means: {np.std(global_means):.2f}")
     
@@ -96,10 +332,8 @@ def temporal_analysis(data):
         months = len(global_means)
         years = months // 12
         if years > 0:
-            monthly_means = np.zeros(12)
-            for month in range(12):
-                monthly_data = global_means[month::12]
-                monthly_means[month] = np.mean(monthly_data)
+            # Whole years only, one row per year
+            monthly_means = global_means[:years * 12].reshape(years, 12).mean(axis=0)
             
             max_month = np.argmax(monthly_means) + 1
             min_month = np.argmin(monthly_means) + 1
@@ -107,16 +341,16 @@ def temporal_analysis(data):
             print(f"Lowest values in month {min_month}")
             print(f"Seasonal amplitude: {np.max(monthly_means) - np.min(monthly_means):.2f}")
     
-    return global_means
+    return global_means, min_idx, max_idx
 
-def spatial_analysis(data):
-    """Analyze spatial patterns"""
+def spatial_analysis(data_tm, has_nans=True):
+    """Analyze spatial patterns (data_tm is time-major: time, lat, lon)"""
     print("\n" + "=" * 60)
     print("SPATIAL PATTERN ANALYSIS")
     print("=" * 60)
     
-    # Calculate temporal mean
-    temporal_mean = np.nanmean(data, axis=2)
+    # Calculate temporal mean (and the std map the plots reuse)
+    temporal_mean, temporal_std = tiled_nanmean_std_over_t(data_tm, skip_nans=has_nans)
     
     print(f"Spatial statistics:")
     print(f"Min spatial value: {np.nanmin(temporal_mean):.2f}")
@@ -127,7 +361,7 @@ def spatial_analysis(data):
     min_loc = np.unravel_index(np.nanargmin(temporal_mean), temporal_mean.shape)
     
     # Convert to lat/lon if this is a global grid
-    if data.shape[0] == 720 and data.shape[1] == 1440:
+    if data_tm.shape[1] == 720 and data_tm.shape[2] == 1440:
         max_lat = 90 - (max_loc[0] * 0.25)
         max_lon = -180 + (max_loc[1] * 0.25)
         min_lat = 90 - (min_loc[0] * 0.25)
@@ -137,10 +371,12 @@ def spatial_analysis(data):
         print(f"Maximum at: {max_lat:.2f}°N, {max_lon:.2f}°E")
         print(f"Minimum at: {min_lat:.2f}°N, {min_lon:.2f}°E")
     
-    return temporal_mean
+    return temporal_mean, temporal_std
 
-def create_visualizations(data, global_means, temporal_mean):
+def create_visualizations(data_tm, global_means, temporal_mean, hist_sample):
     """Create visualizations"""
+    import matplotlib.pyplot as plt
+    
     print("\n" + "=" * 60)
     print("CREATING VISUALIZATIONS")
     print("=" * 60)
@@ -158,7 +394,7 @@ def create_visualizations(data, global_means, temporal_mean):
     
     # 2. Spatial mean map
     ax2 = plt.subplot(2, 3, 2)
-    im2 = plt.imshow(temporal_mean, cmap='RdYlBu_r', aspect='auto')
+    im2 = imshow_downsampled(temporal_mean, cmap='RdYlBu_r', aspect='auto')
     plt.title('Temporal Mean (Spatial Pattern)')
     plt.xlabel('Longitude Index')
     plt.ylabel('Latitude Index')
@@ -166,7 +402,8 @@ def create_visualizations(data, global_means, temporal_mean):
     
     # 3. Histogram
     ax3 = plt.subplot(2, 3, 3)
-    plt.hist(data.flatten()[::10000], bins=50, alpha=0.7, color='green')
+    # 1-in-10000 stride over the time-major cube (hist_sample is 1-in-5000)
+    plt.hist(hist_sample[::2], bins=50, alpha=0.7, color='green')
     plt.title('Data Distribution (Sample)')
     plt.xlabel('Value')
     plt.ylabel('Frequency')
@@ -174,7 +411,7 @@ def create_visualizations(data, global_means, temporal_mean):
     
     # 4. First time slice
     ax4 = plt.subplot(2, 3, 4)
-    im4 = plt.imshow(data[:, :, 0], cmap='RdYlBu_r', aspect='auto')
+    im4 = imshow_downsampled(data_tm[0], cmap='RdYlBu_r', aspect='auto')
     plt.title('First Time Slice')
     plt.xlabel('Longitude Index')
     plt.ylabel('Latitude Index')
@@ -182,8 +419,8 @@ def create_visualizations(data, global_means, temporal_mean):
     
     # 5. Middle time slice
     ax5 = plt.subplot(2, 3, 5)
-    mid_idx = data.shape[2] // 2
-    im5 = plt.imshow(data[:, :, mid_idx], cmap='RdYlBu_r', aspect='auto')
+    mid_idx = data_tm.shape[0] // 2
+    im5 = imshow_downsampled(data_tm[mid_idx], cmap='RdYlBu_r', aspect='auto')
     plt.title(f'Middle Time Slice (t={mid_idx})')
     plt.xlabel('Longitude Index')
     plt.ylabel('Latitude Index')
@@ -191,26 +428,30 @@ def create_visualizations(data, global_means, temporal_mean):
     
     # 6. Last time slice
     ax6 = plt.subplot(2, 3, 6)
-    im6 = plt.imshow(data[:, :, -1], cmap='RdYlBu_r', aspect='auto')
+    im6 = imshow_downsampled(data_tm[-1], cmap='RdYlBu_r', aspect='auto')
     plt.title('Last Time Slice')
     plt.xlabel('Longitude Index')
     plt.ylabel('Latitude Index')
     plt.colorbar(im6, shrink=0.8)
     
     plt.tight_layout()
-    plt.savefig('analysis/mystery_data_analysis.png', dpi=300, bbox_inches='tight')
+    save_figure('analysis/mystery_data_analysis.png')
     print("✓ Saved visualization as 'analysis/mystery_data_analysis.png'")
     
     return fig
 
-def create_detailed_analysis(data, global_means, temporal_mean):
+def create_detailed_analysis(data_tm, global_means, temporal_mean, temporal_std, hist_sample):
     """Create detailed weather analysis plots"""
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
+    
     print("✓ Creating detailed weather analysis...")
     
-    # Convert to more reasonable units for visualization
-    data_display = data / 1000  # Convert to more manageable scale
-    temporal_mean_display = temporal_mean / 1000
-    global_means_display = global_means / 1000
+    # Convert to more reasonable units for visualization; maps keep their raw
+    # values and only their colorbar tick labels are scaled
+    scale = 1000
+    scaled_ticks = FuncFormatter(lambda v, _: f"{v / scale:g}")
+    global_means_display = global_means / scale
     
     fig = plt.figure(figsize=(20, 15))
     
@@ -227,41 +468,41 @@ def create_detailed_analysis(data, global_means, temporal_mean):
     
     # 2. Spatial distribution
     ax2 = plt.subplot(3, 3, 2)
-    im2 = plt.imshow(temporal_mean_display, cmap='RdYlBu_r', aspect='auto')
+    im2 = imshow_downsampled(temporal_mean, cmap='RdYlBu_r', aspect='auto')
     plt.title('Temporal Mean Distribution')
     plt.xlabel('Longitude Index')
     plt.ylabel('Latitude Index')
-    plt.colorbar(im2, shrink=0.8)
+    plt.colorbar(im2, shrink=0.8, format=scaled_ticks)
     
     # 3. First time slice
     ax3 = plt.subplot(3, 3, 3)
-    im3 = plt.imshow(data_display[:, :, 0], cmap='RdYlBu_r', aspect='auto')
+    im3 = imshow_downsampled(data_tm[0], cmap='RdYlBu_r', aspect='auto')
     plt.title('First Time Slice')
-    plt.colorbar(im3, shrink=0.8)
+    plt.colorbar(im3, shrink=0.8, format=scaled_ticks)
     
     # 4. Middle time slice
     ax4 = plt.subplot(3, 3, 4)
-    mid_idx = data.shape[2] // 2
-    im4 = plt.imshow(data_display[:, :, mid_idx], cmap='RdYlBu_r', aspect='auto')
+    mid_idx = data_tm.shape[0] // 2
+    im4 = imshow_downsampled(data_tm[mid_idx], cmap='RdYlBu_r', aspect='auto')
     plt.title(f'Middle Time Slice (t={mid_idx})')
-    plt.colorbar(im4, shrink=0.8)
+    plt.colorbar(im4, shrink=0.8, format=scaled_ticks)
     
     # 5. Last time slice
     ax5 = plt.subplot(3, 3, 5)
-    im5 = plt.imshow(data_display[:, :, -1], cmap='RdYlBu_r', aspect='auto')
+    im5 = imshow_downsampled(data_tm[-1], cmap='RdYlBu_r', aspect='auto')
     plt.title('Last Time Slice')
-    plt.colorbar(im5, shrink=0.8)
+    plt.colorbar(im5, shrink=0.8, format=scaled_ticks)
     
     # 6. Standard deviation map
     ax6 = plt.subplot(3, 3, 6)
-    std_map = np.std(data_display, axis=2)
-    im6 = plt.imshow(std_map, cmap='plasma', aspect='auto')
+    im6 = imshow_downsampled(temporal_std, cmap='plasma', aspect='auto')
     plt.title('Standard Deviation')
-    plt.colorbar(im6, shrink=0.8)
+    plt.colorbar(im6, shrink=0.8, format=scaled_ticks)
     
     # 7. Histogram
     ax7 = plt.subplot(3, 3, 7)
-    sample_data = data_display.flatten()[::10000]
+    # 1-in-10000 stride over the time-major cube (hist_sample is 1-in-5000)
+    sample_data = hist_sample[::2] / scale
     plt.hist(sample_data[sample_data > 0], bins=50, alpha=0.7, color='skyblue')
     plt.title('Data Distribution (Sample)')
     plt.xlabel('Value (scaled)')
@@ -274,10 +515,7 @@ def create_detailed_analysis(data, global_means, temporal_mean):
         months = len(global_means_display)
         years = months // 12
         if years > 0:
-            monthly_means = np.zeros(12)
-            for month in range(12):
-                monthly_data = global_means_display[month::12]
-                monthly_means[month] = np.mean(monthly_data)
+            monthly_means = global_means_display[:years * 12].reshape(years, 12).mean(axis=0)
             
             plt.plot(range(1, 13), monthly_means, 'o-', linewidth=2, markersize=8)
             plt.title('Seasonal Cycle')
@@ -288,38 +526,42 @@ def create_detailed_analysis(data, global_means, temporal_mean):
     
     # 9. Geographic overlay
     ax9 = plt.subplot(3, 3, 9)
-    im9 = plt.imshow(temporal_mean_display, cmap='RdYlBu_r', aspect='auto')
+    im9 = imshow_downsampled(temporal_mean, cmap='RdYlBu_r', aspect='auto')
     
     # Add coordinate grid
     lat_ticks = np.arange(0, 720, 120)
     lon_ticks = np.arange(0, 1440, 240)
-    lat_labels = [f"{90 - (tick * 0.25):.0f}°N" for tick in lat_ticks]
-    lon_labels = [f"{-180 + (tick * 0.25):.0f}°E" for tick in lon_ticks]
+    lat_labels = np.char.add(np.char.mod('%.0f', 90 - lat_ticks * 0.25), '°N')
+    lon_labels = np.char.add(np.char.mod('%.0f', -180 + lon_ticks * 0.25), '°E')
     
     plt.xticks(lon_ticks, lon_labels, rotation=45)
     plt.yticks(lat_ticks, lat_labels)
     plt.title('Geographic Grid Overlay')
-    plt.colorbar(im9, shrink=0.8)
+    plt.colorbar(im9, shrink=0.8, format=scaled_ticks)
     
     plt.tight_layout()
-    plt.savefig('analysis/detailed_weather_analysis.png', dpi=300, bbox_inches='tight')
+    save_figure('analysis/detailed_weather_analysis.png')
     print("✓ Saved detailed analysis as 'analysis/detailed_weather_analysis.png'")
     
     return fig
 
-def create_final_comprehensive_plots(data, global_means):
+def create_final_comprehensive_plots(data_tm, global_means, temporal_mean, temporal_std,
+                                     hist_sample, min_idx, max_idx):
     """Create final comprehensive analysis plots"""
-    print("✓ Creating final comprehensive analysis...")
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
     
-    # Scale data for visualization
-    data_scaled = data / 1000
-    global_means_scaled = global_means / 1000
-    temporal_mean_scaled = np.mean(data_scaled, axis=2)
+    print("✓ Creating final comprehensive analysis...")
     
-    # Find extreme events
-    max_idx = np.argmax(global_means)
-    min_idx = np.argmin(global_means)
+    # Scale data for visualization; maps keep their raw values and only
+    # their colorbar tick labels are scaled
+    scale = 1000
+    scaled_ticks = FuncFormatter(lambda v, _: f"{v / scale:g}")
+    global_means_scaled = global_means / scale
     
+    # data_tm is an in-RAM, time-major contiguous copy, so each data_tm[t] below
+    # is already a contiguous view; there is nothing to gain from preloading
+    # the slices the panels use
     fig = plt.figure(figsize=(24, 18))
     
     # 1. Time series with extremes marked
@@ -335,39 +577,41 @@ def create_final_comprehensive_plots(data, global_means):
     
     # 2. Spatial mean
     ax2 = plt.subplot(3, 4, 2)
-    im2 = plt.imshow(temporal_mean_scaled, cmap='RdBu_r', aspect='auto')
+    im2 = imshow_downsampled(temporal_mean, cmap='RdBu_r', aspect='auto')
     plt.title('Temporal Mean')
-    plt.colorbar(im2, shrink=0.8)
+    plt.colorbar(im2, shrink=0.8, format=scaled_ticks)
     
     # 3. Extreme high event
     ax3 = plt.subplot(3, 4, 3)
-    im3 = plt.imshow(data_scaled[:, :, max_idx], cmap='Reds', aspect='auto')
+    im3 = imshow_downsampled(data_tm[max_idx], cmap='Reds', aspect='auto')
+    # Block averaging smooths single-cell peaks, so mark the slice maximum
+    peak = np.unravel_index(np.nanargmax(data_tm[max_idx]), data_tm.shape[1:])
+    plt.plot(peak[1], peak[0], 'kx', markersize=8, scalex=False, scaley=False)
     plt.title(f'Extreme High Event (t={max_idx})')
-    plt.colorbar(im3, shrink=0.8)
+    plt.colorbar(im3, shrink=0.8, format=scaled_ticks)
     
     # 4. Extreme low event
     ax4 = plt.subplot(3, 4, 4)
-    im4 = plt.imshow(data_scaled[:, :, min_idx], cmap='Blues', aspect='auto')
+    im4 = imshow_downsampled(data_tm[min_idx], cmap='Blues', aspect='auto')
     plt.title(f'Extreme Low Event (t={min_idx})')
-    plt.colorbar(im4, shrink=0.8)
+    plt.colorbar(im4, shrink=0.8, format=scaled_ticks)
     
     # 5. Anomaly map
     ax5 = plt.subplot(3, 4, 5)
-    anomaly = data_scaled[:, :, max_idx] - temporal_mean_scaled
-    im5 = plt.imshow(anomaly, cmap='RdBu_r', aspect='auto')
+    anomaly = data_tm[max_idx] - temporal_mean
+    im5 = imshow_downsampled(anomaly, cmap='RdBu_r', aspect='auto')
     plt.title('Anomaly Pattern')
-    plt.colorbar(im5, shrink=0.8)
+    plt.colorbar(im5, shrink=0.8, format=scaled_ticks)
     
     # 6. Variability map
     ax6 = plt.subplot(3, 4, 6)
-    variability = np.std(data_scaled, axis=2)
-    im6 = plt.imshow(variability, cmap='plasma', aspect='auto')
+    im6 = imshow_downsampled(temporal_std, cmap='plasma', aspect='auto')
     plt.title('Variability (Std Dev)')
-    plt.colorbar(im6, shrink=0.8)
+    plt.colorbar(im6, shrink=0.8, format=scaled_ticks)
     
     # 7. Distribution
     ax7 = plt.subplot(3, 4, 7)
-    sample_data = data_scaled.flatten()[::5000]
+    sample_data = hist_sample / scale
     plt.hist(sample_data[sample_data > 0], bins=100, alpha=0.7, color='green')
     plt.title('Value Distribution')
     plt.xlabel('Value (scaled)')
@@ -380,12 +624,9 @@ def create_final_comprehensive_plots(data, global_means):
         months = len(global_means_scaled)
         years = months // 12
         if years > 0:
-            monthly_means = np.zeros(12)
-            monthly_std = np.zeros(12)
-            for month in range(12):
-                monthly_data = global_means_scaled[month::12]
-                monthly_means[month] = np.mean(monthly_data)
-                monthly_std[month] = np.std(monthly_data)
+            by_year = global_means_scaled[:years * 12].reshape(years, 12)
+            monthly_means = by_year.mean(axis=0)
+            monthly_std = by_year.std(axis=0)
             
             plt.errorbar(range(1, 13), monthly_means, yerr=monthly_std, 
                         marker='o', capsize=5, linewidth=2)
@@ -396,33 +637,38 @@ def create_final_comprehensive_plots(data, global_means):
             plt.grid(True, alpha=0.3)
     
     # 9-12. Time evolution snapshots
-    time_indices = [0, data.shape[2]//4, data.shape[2]//2, data.shape[2]-1]
+    n_times = data_tm.shape[0]
+    time_indices = [0, n_times//4, n_times//2, n_times-1]
     titles = ['Early Period', 'Quarter Point', 'Mid Period', 'Late Period']
     
     for i, (time_idx, title) in enumerate(zip(time_indices, titles)):
         ax = plt.subplot(3, 4, 9 + i)
-        im = plt.imshow(data_scaled[:, :, time_idx], cmap='RdYlBu_r', aspect='auto')
+        im = imshow_downsampled(data_tm[time_idx], cmap='RdYlBu_r', aspect='auto')
         plt.title(f'{title} (t={time_idx})')
-        plt.colorbar(im, shrink=0.6)
+        plt.colorbar(im, shrink=0.6, format=scaled_ticks)
     
     plt.tight_layout()
-    plt.savefig('analysis/final_mystery_analysis.png', dpi=300, bbox_inches='tight')
+    save_figure('analysis/final_mystery_analysis.png')
     print("✓ Saved final analysis as 'analysis/final_mystery_analysis.png'")
     
     return fig
 
-def identify_weather_events(data, global_means):
-    """Identify interesting weather events"""
+def identify_weather_events(data_tm, global_means, max_location):
+    """Identify interesting weather events
+
+    max_location is the (lat, lon, time) index of the global maximum found by
+    basic_analysis, so the cube does not need another argmax pass.
+    """
     print("\n" + "=" * 60)
     print("WEATHER EVENT IDENTIFICATION")
     print("=" * 60)
     
     # Look for extreme events in time series
-    threshold_high = np.percentile(global_means, 95)
-    threshold_low = np.percentile(global_means, 5)
+    # Both quantiles from a single partition of the series
+    threshold_low, threshold_high = np.percentile(global_means, [5, 95])
     
-    extreme_high = np.where(global_means > threshold_high)[0]
-    extreme_low = np.where(global_means < threshold_low)[0]
+    extreme_high = np.flatnonzero(global_means > threshold_high)
+    extreme_low = np.flatnonzero(global_means < threshold_low)
     
     print(f"Extreme Events Analysis:")
     print(f"High threshold (95th percentile): {threshold_high:.2f}")
@@ -437,25 +683,28 @@ def identify_weather_events(data, global_means):
     
     # Analyze spatial patterns during extreme events
     if len(extreme_high) > 0:
-        extreme_high_pattern = np.mean(data[:, :, extreme_high], axis=2)
+        # Sum the contiguous time slices rather than fancy-indexing a copy
+        extreme_high_pattern = np.zeros(data_tm.shape[1:], dtype=np.float64)
+        for t in extreme_high:
+            extreme_high_pattern += data_tm[t]
+        extreme_high_pattern /= len(extreme_high)
         print(f"\nDuring extreme HIGH events:")
         print(f"Peak spatial value: {np.nanmax(extreme_high_pattern):.2f}")
         
         # Find hotspot during extreme events
         max_loc = np.unravel_index(np.nanargmax(extreme_high_pattern), extreme_high_pattern.shape)
-        if data.shape[0] == 720 and data.shape[1] == 1440:
+        if data_tm.shape[1] == 720 and data_tm.shape[2] == 1440:
             max_lat = 90 - (max_loc[0] * 0.25)
             max_lon = -180 + (max_loc[1] * 0.25)
             print(f"Hotspot during extreme global mean events: {max_lat:.2f}°N, {max_lon:.2f}°E")
     
     # Find the TRUE global maximum location
     print(f"\nGLOBAL MAXIMUM ANALYSIS:")
-    global_max_location = np.unravel_index(np.argmax(data), data.shape)
-    if data.shape[0] == 720 and data.shape[1] == 1440:
-        true_max_lat = 90 - (global_max_location[0] * 0.25)
-        true_max_lon = -180 + (global_max_location[1] * 0.25)
-        true_max_time = global_max_location[2]
-        true_max_value = data[global_max_location]
+    if data_tm.shape[1] == 720 and data_tm.shape[2] == 1440:
+        true_max_lat = 90 - (max_location[0] * 0.25)
+        true_max_lon = -180 + (max_location[1] * 0.25)
+        true_max_time = max_location[2]
+        true_max_value = data_tm[true_max_time, max_location[0], max_location[1]]
         print(f"True global maximum: {true_max_value:.2f} units")
         print(f"Location: {true_max_lat:.2f}°N, {true_max_lon:.2f}°E")
         print(f"Time index: {true_max_time}")
@@ -483,27 +732,41 @@ def main():
         print(f"File: {filepath}")
         print(f"File size: {os.path.getsize(filepath) / (1024*1024):.2f} MB")
         
-        # Load the numpy array
+        # Memory-map the array so only the pages touched by each reduction are read
         print("Loading numpy array...")
-        data = np.load(filepath)
+        data = np.load(filepath, mmap_mode='r')
         
         # Run comprehensive analysis
-        basic_analysis(data)
+        has_nans, max_location = basic_analysis(data)
         analyze_dimensions(data)
-        global_means = temporal_analysis(data)
-        temporal_mean = spatial_analysis(data)
+        
+        # Time-major (time, lat, lon) copy: per-time-step slices and means
+        # then walk contiguous memory instead of striding across the cube.
+        # This reads the whole cube into RAM, so it is built only after
+        # basic_analysis, whose np.median makes its own full temporary copy
+        data_tm = np.ascontiguousarray(data.transpose(2, 0, 1))
+        global_means, min_idx, max_idx = temporal_analysis(data_tm, has_nans)
+        temporal_mean, temporal_std = spatial_analysis(data_tm, has_nans)
         
         # Create visualizations
         try:
-            fig1 = create_visualizations(data, global_means, temporal_mean)
-            fig2 = create_detailed_analysis(data, global_means, temporal_mean)
-            fig3 = create_final_comprehensive_plots(data, global_means)
+            # matplotlib is only imported once plotting starts
+            import matplotlib.pyplot as plt
+            
+            # One strided sample shared by all histograms; reshape(-1) is a
+            # view of the contiguous cube, so only the sample itself is copied
+            hist_sample = data_tm.reshape(-1)[::5000].copy()
+            fig1 = create_visualizations(data_tm, global_means, temporal_mean, hist_sample)
+            fig2 = create_detailed_analysis(data_tm, global_means, temporal_mean, temporal_std,
+                                            hist_sample)
+            fig3 = create_final_comprehensive_plots(data_tm, global_means, temporal_mean, temporal_std,
+                                                    hist_sample, min_idx, max_idx)
             plt.show()
         except Exception as e:
             print(f"Visualization error (matplotlib may not be available): {e}")
         
         # Identify weather events
-        identify_weather_events(data, global_means)
+        identify_weather_events(data_tm, global_means, max_location)
         
         print("\n" + "=" * 60)
         print("INVESTIGATION COMPLETE")